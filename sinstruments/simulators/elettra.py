@@ -27,6 +27,7 @@ A simple *nc* client can be used to connect to the instrument:
 """
 
 import random
+import logging
 import functools
 
 import gevent
@@ -35,6 +36,10 @@ from sinstruments.simulator import BaseDevice
 
 
 def Cmd(default=None, allowed=None, access="rw", dtype=None):
+    # dict means a min/max range. Anything else (even a one-shot iterator
+    # like map) is frozen so that it can be checked many times in O(1)
+    if allowed is not None and not isinstance(allowed, dict):
+        allowed = frozenset(allowed)
     return dict(default=default, access=access, dtype=dtype, allowed=allowed)
 
 
@@ -76,6 +81,9 @@ class ElettraElectrometer(BaseDevice):
         ver=SCmdR("AH501D 2.0.3"),
     )
 
+    # commands implemented by a method with the same name
+    METHOD_COMMANDS = ("acq", "get")
+
     ASCII_INT = "{0:06x}"
     SHORT_GET = "g"
 
@@ -86,10 +94,13 @@ class ElettraElectrometer(BaseDevice):
         for k, v in self.COMMANDS.items():
             opts.setdefault(k, v["default"])
         self.commands = opts
+        self._nb_channels = int(opts.get("chn", 4))
+        self._res = int(opts.get("res", 24))
         firmware_version_str = self["ver"].rsplit(" ", 1)[1]
         firmware_version = tuple(map(int, firmware_version_str.split(".")))
         self.firmware_version = firmware_version
         self.acq_task = None
+        self._method_cmds = {name: getattr(self, name) for name in self.METHOD_COMMANDS}
 
     def encode(self, cmd, value):
         cmd = cmd.lower()
@@ -108,8 +119,6 @@ class ElettraElectrometer(BaseDevice):
         rvalue = value
         if dtype == bool:
             rvalue = value.upper() == "ON"
-            if allowed and rvalue not in allowed:
-                raise ValueError("set {0!r} to {1} not allowed".format(cmd, value))
         if dtype == int:
             rvalue = int(value)
             if isinstance(allowed, dict):
@@ -119,11 +128,8 @@ class ElettraElectrometer(BaseDevice):
                     raise ValueError(
                         "set {0!r} to {1} outside allowed range".format(cmd, value)
                     )
-            elif isinstance(allowed, (tuple, list, dict, set)):
-                if rvalue not in allowed:
-                    raise ValueError(
-                        "set {0!r} not in allowed values".format(cmd)
-                    )
+        if isinstance(allowed, frozenset) and rvalue not in allowed:
+            raise ValueError("set {0!r} to {1} not allowed".format(cmd, value))
         return rvalue
 
     def __getitem__(self, cmd):
@@ -139,20 +145,28 @@ class ElettraElectrometer(BaseDevice):
         if "w" not in command["access"]:
             raise ValueError("{0} is not writable".format(cmd))
         self.commands[cmd] = value
+        # keep values used on every acquisition frame as plain attributes
+        if cmd == "chn":
+            self._nb_channels = int(value)
+        elif cmd == "res":
+            self._res = int(value)
 
     def handle_message(self, line):
-        self._log.debug("processing line %r", line)
-        line = line.strip()
-        if line.lower() == self.SHORT_GET:
-            result = self.get
-        elif line.endswith("?"):
-            result = self.handle_read(line.rsplit(" ", 1)[0])
-        else:
-            result = self.handle_write(line)
-        if result is not None:
-            result += self.TERM
-            self._log.debug("answering with %r", result)
+        message, result = line, None
+        try:
+            line = line.strip()
+            if line.lower() == self.SHORT_GET:
+                result = self.get
+            elif line.endswith("?"):
+                result = self.handle_read(line.rsplit(" ", 1)[0])
+            else:
+                result = self.handle_write(line)
+            if result is not None:
+                result += self.TERM
             return result
+        finally:
+            if self._log.isEnabledFor(logging.DEBUG):
+                self._log.debug("processed line %r, answering with %r", message, result)
 
     def handle_read(self, line):
         try:
@@ -165,8 +179,8 @@ class ElettraElectrometer(BaseDevice):
     def _handle_read(self, line):
         args = line.split()
         cmd, args = args[0].lower(), args[1:]
-        if hasattr(self, cmd):
-            return getattr(self, cmd)()
+        if cmd in self._method_cmds:
+            return self._method_cmds[cmd]()
         if cmd in self.commands:
             value = self[cmd]
             return "{0} {1}".format(cmd.upper(), self.encode(cmd, value))
@@ -185,8 +199,8 @@ class ElettraElectrometer(BaseDevice):
         args = line.split()
         cmd, args = args[0].lower(), args[1:]
         arg = args[0] if args else None
-        if hasattr(self, cmd):
-            return getattr(self, cmd)(arg)
+        if cmd in self._method_cmds:
+            return self._method_cmds[cmd](arg)
         if cmd in self.commands:
             self[cmd] = self.decode(cmd, arg)
             return self.ACK
@@ -202,9 +216,8 @@ class ElettraElectrometer(BaseDevice):
         return self.ACK
 
     def _generate(self):
-        nb_channels = self.commands.get("chn", 4)
-        res = self.commands.get("res", 24)
-        return [random.randrange(0, 2 ** res) for _ in range(nb_channels)]
+        top = 2 ** self._res
+        return [random.randrange(0, top) for _ in range(self._nb_channels)]
 
     def get(self):
         values = self._generate()
@@ -254,14 +267,17 @@ class AH501D(ElettraElectrometer):
     ASCII_INT = "{0:06x}"
     SHORT_GET = "g"
 
+    def _stop_acq(self):
+        if not self.acq_task:
+            return self.NAK
+        self.acq_task.kill()
+        self.acq_task = None
+        return self.ACK
+
     def handle_write(self, line):
         cmd = line.strip().split(" ", 1)[0].upper()
         if cmd == "S":
-            if self.acq_task:
-                self.acq_task.kill()
-                return self.ACK
-            else:
-                return self.NAK
+            return self._stop_acq()
         result = super(AH501D, self).handle_write(line)
         # No result is sent after an 'ACQ ON' command
         if cmd != "ACQ":
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the elettra electrometer simulator."""
+
+import logging
+
+from sinstruments.simulators.elettra import AH401D, AH501D
+
+
+def test_ah401d_rng_allowed_values():
+    device = AH401D("ah401d")
+    assert device.handle_message("RNG junk") == "NAK\r\n"
+    assert device.handle_message("RNG 9") == "NAK\r\n"
+    assert device.commands["rng"] == "1"
+    # allowed values must still be valid after being checked once
+    assert device.handle_message("RNG 3") == "ACK\r\n"
+    assert device.handle_message("RNG XY") == "ACK\r\n"
+    assert device.commands["rng"] == "XY"
+
+
+def test_ah501d_int_allowed_values():
+    device = AH501D("ah501d")
+    assert device.handle_message("CHN 3") == "NAK\r\n"
+    assert device.handle_message("CHN 2") == "ACK\r\n"
+    assert device.handle_message("CHN ?") == "CHN 2\r\n"
+    assert device.handle_message("NAQ -1") == "NAK\r\n"
+    assert device.handle_message("NAQ 10") == "ACK\r\n"
+
+
+def test_only_method_commands_are_callable():
+    device = AH501D("ah501d")
+    assert device.handle_message("ENCODE ?") == "NAK\r\n"
+    assert device.handle_message("HANDLE_READ x") == "NAK\r\n"
+    assert device.handle_message("VER ?") == "VER AH501D 2.0.3\r\n"
+
+
+def test_ah501d_stop_acquisition():
+    device = AH501D("ah501d")
+    assert device.handle_message("S") == "NAK\r\n"
+    # no reply after ACQ ON
+    assert device.handle_message("ACQ ON") is None
+    task = device.acq_task
+    assert task is not None
+    try:
+        # a query must not stop the acquisition
+        assert device.handle_message("S ?") == "NAK\r\n"
+        assert device.acq_task is task
+        assert device.handle_message("S") == "ACK\r\n"
+        assert device.acq_task is None
+        # acquisition can be restarted after being stopped
+        assert device.handle_message("ACQ ON") is None
+        assert device.acq_task is not None
+    finally:
+        for t in (task, device.acq_task):
+            if t is not None:
+                t.kill()
+
+
+def test_debug_log_has_message_and_reply(caplog):
+    device = AH501D("ah501d")
+    with caplog.at_level(logging.DEBUG, logger=device._log.name):
+        assert device.handle_message("CHN ?") == "CHN 4\r\n"
+    assert caplog.messages == ["processed line 'CHN ?', answering with 'CHN 4\\r\\n'"]
+
+
+def test_ah501d_acquisition_follows_chn_and_res():
+    device = AH501D("ah501d")
+    assert len(device.get().split()) == 4
+    assert device.handle_message("CHN 2") == "ACK\r\n"
+    assert len(device.get().split()) == 2
+    assert device.handle_message("RES 16") == "ACK\r\n"
+    for _ in range(100):
+        values = [int(value, 16) for value in device.get().split()]
+        assert len(values) == 2
+        assert all(0 <= value < 2 ** 16 for value in values)